@@ -15,6 +15,7 @@ class CSVToHTMLConverter:
     def __init__(self):
         self.graph = nx.DiGraph()
         self.relationships = []
+        self._relationship_keys = set()  # 重複チェック用の (table1, column1, table2, column2)
         self.tables = set()
 
     def load_csv(self, csv_file_path: str):
@@ -31,11 +32,11 @@ class CSVToHTMLConverter:
             print(f"✓ CSVファイルを読み込みました: {csv_file_path}")
             print(f"  関係数: {len(df)}行")
             
-            # データを処理
+            # データを処理（同じテーブル名・カラム名は intern して1つの文字列を共有）
             for _, row in df.iterrows():
                 self._add_relationship(
-                    str(row['table1']), str(row['column1']),
-                    str(row['table2']), str(row['column2'])
+                    sys.intern(str(row['table1'])), sys.intern(str(row['column1'])),
+                    sys.intern(str(row['table2'])), sys.intern(str(row['column2']))
                 )
             
             print(f"  テーブル数: {len(self.tables)}")
@@ -47,31 +48,31 @@ class CSVToHTMLConverter:
 
     def _add_relationship(self, table1: str, col1: str, table2: str, col2: str):
         """関係をグラフに追加"""
-        relationship = {
-            'table1': table1,
-            'column1': col1,
-            'table2': table2,
-            'column2': col2
-        }
-        
-        # 重複チェック
-        if relationship not in self.relationships:
-            self.relationships.append(relationship)
+        # 重複チェック（リストの線形探索ではなくキーの集合で判定）
+        key = (table1, col1, table2, col2)
+        if key not in self._relationship_keys:
+            self._relationship_keys.add(key)
+            self.relationships.append({
+                'table1': table1,
+                'column1': col1,
+                'table2': table2,
+                'column2': col2
+            })
         
         # グラフに追加 - 複数関係の累積サポート
         if table1 and table2:
-            if self.graph.has_edge(table1, table2):
-                # 既存の関係に追加
-                existing_columns = self.graph.edges[table1, table2].get('columns', '')
-                new_relationship = f"{col1} -> {col2}"
-                if existing_columns and new_relationship not in existing_columns:
-                    updated_columns = f"{existing_columns}; {new_relationship}"
-                else:
-                    updated_columns = new_relationship
-                self.graph.edges[table1, table2]['columns'] = updated_columns
+            new_relationship = f"{col1} -> {col2}"
+            edge_attrs = self.graph.get_edge_data(table1, table2)
+            if edge_attrs is not None:
+                # 既存の関係に追加（エッジごとの集合で重複判定）
+                column_set = edge_attrs['column_set']
+                if new_relationship not in column_set:
+                    column_set.add(new_relationship)
+                    edge_attrs['columns'] = f"{edge_attrs['columns']}; {new_relationship}"
             else:
                 # 新しいエッジを作成
-                self.graph.add_edge(table1, table2, columns=f"{col1} -> {col2}")
+                self.graph.add_edge(table1, table2, columns=new_relationship,
+                                    column_set={new_relationship})
             
             self.tables.add(table1)
             self.tables.add(table2)
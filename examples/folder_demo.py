@@ -163,9 +163,14 @@ def demo_file_analysis():
             print(f"   SQL: {file_data['sql'][:80]}...")
             print(f"   関係数: {len(relationships)}")
             
-            for rel in relationships:
-                if rel['table1'] and rel['table2']:
-                    print(f"     • {rel['table1']}.{rel['column1']} -> {rel['table2']}.{rel['column2']}")
+            # 関係一覧は1回の print でまとめて出力
+            lines = [
+                f"     • {rel['table1']}.{rel['column1']} -> {rel['table2']}.{rel['column2']}"
+                for rel in relationships
+                if rel['table1'] and rel['table2']
+            ]
+            if lines:
+                print('\n'.join(lines))
 
 def demo_output_files():
     """出力ファイル確認"""
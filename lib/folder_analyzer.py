@@ -9,6 +9,49 @@ import xml.etree.ElementTree as ET
 import re
 from .sql_join_analyzer import SQLJoinAnalyzer
 
+# _clean_mybatis_sql で使う置換ルール（呼び出しごとの再コンパイルを避けるためモジュールで一度だけコンパイル）
+# 適用順に意味があるため、順番を変えないこと
+_MYBATIS_CLEANUP_RULES = (
+    # #{parameter} や ${parameter} を適当な値に置換
+    (re.compile(r'#\{[^}]+\}'), "'placeholder'"),
+    (re.compile(r'\$\{[^}]+\}'), "placeholder"),
+    # 動的SQL要素を処理（ネストしたタグにも対応）
+    # choose/when/otherwise
+    (re.compile(r'<choose[^>]*>.*?<when[^>]*>(.*?)</when>.*?</choose>', re.DOTALL), r'\1'),
+    (re.compile(r'<choose[^>]*>.*?<otherwise[^>]*>(.*?)</otherwise>.*?</choose>', re.DOTALL), r'\1'),
+    # bind要素
+    (re.compile(r'<bind[^>]*name="([^"]*)"[^>]*value="([^"]*)"[^>]*/?>'), r'/* bind \1 = \2 */'),
+    # selectKey要素
+    (re.compile(r'<selectKey[^>]*>.*?</selectKey>', re.DOTALL), ''),
+    # sql要素（共通SQL断片）
+    (re.compile(r'<sql[^>]*id="([^"]*)"[^>]*>(.*?)</sql>', re.DOTALL), r'/* sql fragment \1: \2 */'),
+    # 残りの動的タグを除去（ネストにも対応）
+    # if, where, set, trim, foreach, include
+    (re.compile(r'<if[^>]*>(.*?)</if>', re.DOTALL), r'\1'),
+    (re.compile(r'<where[^>]*>(.*?)</where>', re.DOTALL), r'WHERE \1'),
+    (re.compile(r'<set[^>]*>(.*?)</set>', re.DOTALL), r'SET \1'),
+    (re.compile(r'<trim[^>]*>(.*?)</trim>', re.DOTALL), r'\1'),
+    (re.compile(r'<foreach[^>]*>(.*?)</foreach>', re.DOTALL), r'\1'),
+    (re.compile(r'<include[^>]*refid="([^"]*)"[^>]*/?>'), r'/* include \1 */'),
+    # 残りの全XMLタグを除去
+    (re.compile(r'<[^>]+>'), ''),
+    # CDATA セクションを処理
+    (re.compile(r'<!\[CDATA\[(.*?)\]\]>', re.DOTALL), r'\1'),
+    # コメントを除去
+    (re.compile(r'<!--.*?-->', re.DOTALL), ''),
+    # 余分な空白を整理
+    (re.compile(r'\s+'), ' '),
+    (re.compile(r'\s*;\s*$'), ''),  # 末尾のセミコロンを除去
+)
+
+# strip 後に適用する空のWHERE/SETの除去ルール
+_EMPTY_CLAUSE_RULES = (
+    (re.compile(r'\bWHERE\s*$'), ''),
+    (re.compile(r'\bSET\s*$'), ''),
+    (re.compile(r'\bWHERE\s+AND\b'), 'WHERE'),
+    (re.compile(r'\bSET\s*,'), 'SET'),
+)
+
 class FolderSQLAnalyzer:
     def __init__(self):
         self.analyzer = SQLJoinAnalyzer()
@@ -81,9 +124,7 @@ class FolderSQLAnalyzer:
                         all_queries.append(stmt['sql'])
                         
                         print(f"  関係数: {len(relationships)}")
-                        for rel in relationships:
-                            if rel['table1'] and rel['table2']:
-                                print(f"    {rel['table1']}.{rel['column1']} -> {rel['table2']}.{rel['column2']}")
+                        self._print_relationships(relationships, "    ")
                     
                     file_results[sql_file] = {
                         'sql_statements': sql_statements,
@@ -111,9 +152,7 @@ class FolderSQLAnalyzer:
                     all_queries.append(sql_content)
                     
                     print(f"関係数: {len(relationships)}")
-                    for rel in relationships:
-                        if rel['table1'] and rel['table2']:
-                            print(f"  {rel['table1']}.{rel['column1']} -> {rel['table2']}.{rel['column2']}")
+                    self._print_relationships(relationships, "  ")
                 
             except Exception as e:
                 print(f"エラー: ファイル読み込み失敗 {sql_file}: {e}")
@@ -126,21 +165,23 @@ class FolderSQLAnalyzer:
         print(f"総ファイル数: {len(file_results)}")
         print(f"統合関係数: {len(self.all_relationships)}")
         
-        # テーブル統計
-        tables = set()
-        for rel in self.all_relationships:
-            if rel['table1']:
-                tables.add(rel['table1'])
-            if rel['table2']:
-                tables.add(rel['table2'])
+        # テーブル統計（両側のテーブル名を1つの集合内包表記で収集）
+        tables = {
+            table
+            for rel in self.all_relationships
+            for table in (rel['table1'], rel['table2'])
+            if table
+        }
         
+        # 表示と戻り値で同じ並びを使うため、ソートは一度だけ
+        sorted_tables = sorted(tables)
         print(f"検出テーブル数: {len(tables)}")
-        print(f"テーブル一覧: {', '.join(sorted(tables))}")
+        print(f"テーブル一覧: {', '.join(sorted_tables)}")
         
         return {
             'file_results': file_results,
             'combined_relationships': self.all_relationships,
-            'tables': sorted(tables),
+            'tables': sorted_tables,
             'stats': {
                 'total_files': len(file_results),
                 'total_relationships': len(self.all_relationships),
@@ -148,6 +189,17 @@ class FolderSQLAnalyzer:
             }
         }
     
+    @staticmethod
+    def _print_relationships(relationships, indent: str):
+        """クエリごとの関係一覧を1回の print でまとめて出力"""
+        lines = [
+            f"{indent}{rel['table1']}.{rel['column1']} -> {rel['table2']}.{rel['column2']}"
+            for rel in relationships
+            if rel['table1'] and rel['table2']
+        ]
+        if lines:
+            print('\n'.join(lines))
+    
     def export_results(self, output_dir: str = "output", prefix: str = "folder_analysis"):
         """
         解析結果をエクスポート
@@ -180,14 +232,16 @@ class FolderSQLAnalyzer:
             f.write(f"総関係数: {len(self.all_relationships)}\n\n")
             
             f.write("=== 検出された関係 ===\n")
-            for i, rel in enumerate(self.all_relationships, 1):
-                if rel['table1'] and rel['table2']:
-                    f.write(f"{i:3d}. {rel['table1']}.{rel['column1']} ({rel['column_definition1']}) -> "
-                           f"{rel['table2']}.{rel['column2']} ({rel['column_definition2']})\n")
+            # 行ごとの write 呼び出しを避け、行をまとめて書き出す
+            f.writelines(
+                f"{i:3d}. {rel['table1']}.{rel['column1']} ({rel['column_definition1']}) -> "
+                f"{rel['table2']}.{rel['column2']} ({rel['column_definition2']})\n"
+                for i, rel in enumerate(self.all_relationships, 1)
+                if rel['table1'] and rel['table2']
+            )
             
             f.write(f"\n=== 解析ファイル一覧 ===\n")
-            for sql_file in sorted(self.sql_files):
-                f.write(f"- {os.path.basename(sql_file)}\n")
+            f.writelines(f"- {os.path.basename(sql_file)}\n" for sql_file in sorted(self.sql_files))
         
         print(f"サマリー出力: {summary_file}")
     
@@ -288,7 +342,8 @@ class FolderSQLAnalyzer:
                     # 要素全体のテキストを取得（子要素も含む）
                     full_sql = self._extract_full_element_text(element)
                     
-                    if full_sql and full_sql.strip():
+                    # 空白だけかどうかは isspace() で判定（strip() のコピーを作らない）
+                    if full_sql and not full_sql.isspace():
                         # MyBatis特有の記法を除去
                         cleaned_sql = self._clean_mybatis_sql(full_sql)
                         if cleaned_sql:
@@ -346,10 +401,10 @@ class FolderSQLAnalyzer:
                     return self._extract_full_element_text(child)
         elif tag == 'where':
             content = self._extract_full_element_text(element)
-            return f"WHERE {content}" if content.strip() else ""
+            return f"WHERE {content}" if content and not content.isspace() else ""
         elif tag == 'set':
             content = self._extract_full_element_text(element)
-            return f"SET {content}" if content.strip() else ""
+            return f"SET {content}" if content and not content.isspace() else ""
         elif tag == 'trim':
             # trim要素の内容をそのまま返す
             return self._extract_full_element_text(element)
@@ -381,53 +436,14 @@ class FolderSQLAnalyzer:
         
         cleaned = sql_text
         
-        # MyBatis特有の記法を除去
-        # #{parameter} や ${parameter} を適当な値に置換
-        cleaned = re.sub(r'#\{[^}]+\}', "'placeholder'", cleaned)
-        cleaned = re.sub(r'\$\{[^}]+\}', "placeholder", cleaned)
-        
-        # 動的SQL要素を処理（ネストしたタグにも対応）
-        # choose/when/otherwise
-        cleaned = re.sub(r'<choose[^>]*>.*?<when[^>]*>(.*?)</when>.*?</choose>', r'\1', cleaned, flags=re.DOTALL)
-        cleaned = re.sub(r'<choose[^>]*>.*?<otherwise[^>]*>(.*?)</otherwise>.*?</choose>', r'\1', cleaned, flags=re.DOTALL)
-        
-        # bind要素
-        cleaned = re.sub(r'<bind[^>]*name="([^"]*)"[^>]*value="([^"]*)"[^>]*/?>', r'/* bind \1 = \2 */', cleaned)
-        
-        # selectKey要素
-        cleaned = re.sub(r'<selectKey[^>]*>.*?</selectKey>', '', cleaned, flags=re.DOTALL)
-        
-        # sql要素（共通SQL断片）
-        cleaned = re.sub(r'<sql[^>]*id="([^"]*)"[^>]*>(.*?)</sql>', r'/* sql fragment \1: \2 */', cleaned, flags=re.DOTALL)
-        
-        # 残りの動的タグを除去（ネストにも対応）
-        # if, where, set, trim, foreach, include
-        cleaned = re.sub(r'<if[^>]*>(.*?)</if>', r'\1', cleaned, flags=re.DOTALL)
-        cleaned = re.sub(r'<where[^>]*>(.*?)</where>', r'WHERE \1', cleaned, flags=re.DOTALL)
-        cleaned = re.sub(r'<set[^>]*>(.*?)</set>', r'SET \1', cleaned, flags=re.DOTALL)
-        cleaned = re.sub(r'<trim[^>]*>(.*?)</trim>', r'\1', cleaned, flags=re.DOTALL)
-        cleaned = re.sub(r'<foreach[^>]*>(.*?)</foreach>', r'\1', cleaned, flags=re.DOTALL)
-        cleaned = re.sub(r'<include[^>]*refid="([^"]*)"[^>]*/?>', r'/* include \1 */', cleaned)
-        
-        # 残りの全XMLタグを除去
-        cleaned = re.sub(r'<[^>]+>', '', cleaned)
-        
-        # CDATA セクションを処理
-        cleaned = re.sub(r'<!\[CDATA\[(.*?)\]\]>', r'\1', cleaned, flags=re.DOTALL)
-        
-        # コメントを除去
-        cleaned = re.sub(r'<!--.*?-->', '', cleaned, flags=re.DOTALL)
-        
-        # 余分な空白を整理
-        cleaned = re.sub(r'\s+', ' ', cleaned)
-        cleaned = re.sub(r'\s*;\s*$', '', cleaned)  # 末尾のセミコロンを除去
+        # 事前コンパイル済みの置換ルールを順番に適用
+        for pattern, replacement in _MYBATIS_CLEANUP_RULES:
+            cleaned = pattern.sub(replacement, cleaned)
         cleaned = cleaned.strip()
         
         # 空のWHERE/SETを除去
-        cleaned = re.sub(r'\bWHERE\s*$', '', cleaned)
-        cleaned = re.sub(r'\bSET\s*$', '', cleaned)
-        cleaned = re.sub(r'\bWHERE\s+AND\b', 'WHERE', cleaned)
-        cleaned = re.sub(r'\bSET\s*,', 'SET', cleaned)
+        for pattern, replacement in _EMPTY_CLAUSE_RULES:
+            cleaned = pattern.sub(replacement, cleaned)
         
         return cleaned
 
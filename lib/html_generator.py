@@ -3,73 +3,78 @@
 HTMLビジュアライゼーション生成の共通モジュール
 """
 
+import html
 import json
+import re
 from typing import List, Dict, Any
 
+try:
+    import orjson
+except ImportError:  # orjson は任意（未インストールなら標準の json を使用）
+    orjson = None
 
-class HTMLTemplateGenerator:
-    """HTMLテンプレート生成クラス"""
-    
-    def __init__(self):
-        pass
+
+def _dumps_json(data) -> str:
+    """ページに埋め込むデータを改行・インデントなしの JSON に変換"""
+    if orjson is not None:
+        return orjson.dumps(data).decode('utf-8')
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+
+
+_PLACEHOLDER_RE = re.compile(r'__([A-Z][A-Z0-9_]*?)__')
+
+
+def _fill_template(template: str, values: Dict[str, str]) -> str:
+    """
+    テンプレート中の __NAME__ プレースホルダーを values[NAME] で一度に置換
     
-    def create_html_template(self, nodes_data: List[Dict[str, Any]], edges_data: List[Dict[str, Any]], 
-                           title: str = "SQL Table Relationships", 
-                           subtitle: str = "テーブル間の関係の可視化",
-                           source_info: str = None) -> str:
-        """
-        インタラクティブHTMLテンプレートを生成
-        
-        Args:
-            nodes_data: ノードデータのリスト
-            edges_data: エッジデータのリスト
-            title: ページタイトル
-            subtitle: サブタイトル
-            source_info: データソース情報（CSV情報など）
-        
-        Returns:
-            HTMLコンテンツ文字列
-        """
-        
-        # データソース情報のHTMLを生成
-        source_info_html = ""
-        if source_info:
-            source_info_html = f'''
+    1 パスで置換するため、差し込んだ値（タイトルや JSON など）の中の
+    プレースホルダー風の文字列が再置換されることはない。values にない名前はそのまま残す。
+    """
+    return _PLACEHOLDER_RE.sub(lambda match: values.get(match.group(1), match.group(0)), template)
+
+
+# データソース情報カード（__SOURCE_INFO__ を置換）
+_SOURCE_INFO_TEMPLATE = '''
         <!-- Data Source Info -->
         <div class="card">
             <div class="csv-info">
                 <span class="material-icons">info</span>
-                {source_info}
+                __SOURCE_INFO__
             </div>
         </div>
         '''
-        
-        return f'''<!DOCTYPE html>
+
+# ページ全体のHTMLテンプレート（__NAME__ 形式のプレースホルダーを置換して使用）
+_HTML_TEMPLATE = '''<!DOCTYPE html>
 <html lang="ja">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{title}</title>
-    <script src="https://unpkg.com/vis-network/standalone/umd/vis-network.min.js"></script>
+    <title>__TITLE__</title>
+    <!-- vis.js: download starts here, evaluation waits until the page content has been parsed -->
+    <link rel="preload" as="script" href="https://unpkg.com/vis-network/standalone/umd/vis-network.min.js">
+    <link rel="preconnect" href="https://fonts.googleapis.com">
+    <link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>
     <!-- Material Icons -->
     <link href="https://fonts.googleapis.com/icon?family=Material+Icons" rel="stylesheet">
     <!-- Roboto Font -->
     <link href="https://fonts.googleapis.com/css2?family=Roboto:wght@300;400;500;700&display=swap" rel="stylesheet">
     <style>
-        {self._get_css_styles()}
+        __CSS_STYLES__
     </style>
 </head>
 <body>
     <div class="app-bar">
         <h1>
             <span class="material-icons">table_chart</span>
-            {title}
+            __TITLE__
         </h1>
-        <p>{subtitle}</p>
+        <p>__SUBTITLE__</p>
     </div>
 
     <div class="container">
-        {source_info_html}
+        __SOURCE_INFO_HTML__
         
         <!-- Controls Card -->
         <div class="card controls-card">
@@ -95,12 +100,13 @@ class HTMLTemplateGenerator:
                                id="table-search" 
                                class="search-input" 
                                placeholder="テーブル名を検索..." 
-                               oninput="searchTables()"
+                               oninput="searchTablesDebounced()"
                                onkeyup="handleSearchKeyup(event)"
                                onfocus="showSearchResults()"
                                onblur="hideSearchResults()"
                                autocomplete="off">
                         <div id="search-results" class="search-results"></div>
+                        <template id="search-row-tpl"><div class="search-result-item"><span class="material-icons">table_chart</span><span class="row-label"></span></div></template>
                     </div>
                 </div>
             </div>
@@ -115,11 +121,11 @@ class HTMLTemplateGenerator:
         <div class="card stats-card">
             <div class="stats">
                 <div class="stat-item">
-                    <div class="stat-number">{len(nodes_data)}</div>
+                    <div class="stat-number">__NODE_COUNT__</div>
                     <div class="stat-label">Tables</div>
                 </div>
                 <div class="stat-item">
-                    <div class="stat-number">{len(edges_data)}</div>
+                    <div class="stat-number">__EDGE_COUNT__</div>
                     <div class="stat-label">Relationships</div>
                 </div>
                 <div class="stat-item">
@@ -172,15 +178,14 @@ class HTMLTemplateGenerator:
         </div>
     </div>
 
+    <script src="https://unpkg.com/vis-network/standalone/umd/vis-network.min.js"></script>
     <script>
-        {self._get_javascript_code(nodes_data, edges_data)}
+        __JAVASCRIPT_CODE__
     </script>
 </body>
 </html>'''
 
-    def _get_css_styles(self) -> str:
-        """CSSスタイルを取得"""
-        return '''
+_CSS_STYLES = '''
         * {
             box-sizing: border-box;
         }
@@ -317,6 +322,9 @@ class HTMLTemplateGenerator:
         
         .search-results {
             position: fixed;
+            top: 0;
+            left: 0;
+            will-change: transform;
             background: white;
             border: 1px solid #ddd;
             border-radius: 4px;
@@ -326,6 +334,7 @@ class HTMLTemplateGenerator:
             display: none;
             z-index: 10000;
             min-width: 250px;
+            contain: layout paint;
         }
         
         .search-result-item {
@@ -335,6 +344,10 @@ class HTMLTemplateGenerator:
             align-items: center;
             border-bottom: 1px solid #f0f0f0;
             transition: background-color 0.2s;
+            height: 44px;
+            contain: strict;
+            content-visibility: auto;
+            contain-intrinsic-size: auto 44px;
         }
         
         .search-result-item:hover, .search-result-item.highlighted {
@@ -347,6 +360,11 @@ class HTMLTemplateGenerator:
             color: #666;
         }
         
+        .search-highlight {
+            background-color: #fff3cd;
+            font-weight: bold;
+        }
+        
         .search-no-results {
             padding: 16px;
             text-align: center;
@@ -357,15 +375,20 @@ class HTMLTemplateGenerator:
         .network-card {
             height: 600px;
             position: relative;
+            contain: strict;
         }
         
         #network-container {
             width: 100%;
             height: 100%;
+            contain: strict;
+            will-change: transform;
+            transform: translateZ(0);
         }
         
         .stats-card {
             padding: 24px;
+            contain: layout paint style;
         }
         
         .stats {
@@ -399,6 +422,7 @@ class HTMLTemplateGenerator:
         
         .details-panel {
             margin-top: 16px;
+            contain: layout paint style;
         }
         
         .details-header {
@@ -452,6 +476,7 @@ class HTMLTemplateGenerator:
             border-radius: 8px;
             box-shadow: 0 2px 4px rgba(0,0,0,0.1);
             overflow: hidden;
+            contain: layout paint style;
         }
         
         .section-header {
@@ -487,6 +512,7 @@ class HTMLTemplateGenerator:
             border-radius: 8px;
             border-left: 4px solid #1976d2;
             transition: background-color 0.2s;
+            contain: layout style;
         }
         
         .table-connection:hover {
@@ -508,6 +534,7 @@ class HTMLTemplateGenerator:
             font-family: 'Roboto Mono', monospace;
             font-size: 13px;
             transition: box-shadow 0.2s;
+            contain: layout style;
         }
         
         .join-condition:hover {
@@ -527,11 +554,22 @@ class HTMLTemplateGenerator:
             font-size: 16px;
         }
         
+        .column-count {
+            color: #ff9800;
+            font-size: 12px;
+            margin-left: 8px;
+        }
+        
+        .condition-columns {
+            color: #424242;
+        }
+        
         .info-item {
             display: flex;
             align-items: center;
             padding: 8px 0;
             border-bottom: 1px solid #f0f0f0;
+            contain: layout style;
         }
         
         .info-item:last-child {
@@ -568,224 +606,305 @@ class HTMLTemplateGenerator:
             margin-right: 8px;
             color: #4caf50;
         }
+        
+        @media (prefers-reduced-motion: reduce) {
+            * {
+                transition: none !important;
+                scroll-behavior: auto !important;
+            }
+        }
         '''
 
-    def _get_javascript_code(self, nodes_data: List[Dict[str, Any]], edges_data: List[Dict[str, Any]]) -> str:
-        """JavaScript コードを取得"""
-        return f'''
+# vis.js 初期化と検索・詳細表示のスクリプト（__NODES_JSON__ などのデータを埋め込んで使用）
+_JAVASCRIPT_TEMPLATE = '''
+        // Debug logging (enabled with create_html_template(debug=True))
+        const DEBUG = __DEBUG__;
+        const dlog = DEBUG ? console.log.bind(console) : function() {};
+        
+        // Skip camera / scroll animations when the OS asks for reduced motion
+        const REDUCED_MOTION = window.matchMedia('(prefers-reduced-motion: reduce)').matches;
+        
         // Data
-        const nodes = new vis.DataSet({json.dumps(nodes_data, ensure_ascii=False, indent=2)});
-        const edges = new vis.DataSet({json.dumps(edges_data, ensure_ascii=False, indent=2)});
+        const nodes = new vis.DataSet(__NODES_JSON__);
+        const edges = new vis.DataSet(__EDGES_JSON__);
+        // Connected tables and rendered join conditions per node (precomputed in Python)
+        const nodeDetails = __NODE_DETAILS_JSON__;
         
         // Configuration
-        const options = {{
-            layout: {{
-                hierarchical: {{
+        const options = {
+            layout: {
+                hierarchical: {
                     enabled: true,
                     direction: 'UD',
                     sortMethod: 'directed',
                     levelSeparation: 150,
                     nodeSpacing: 200
-                }}
-            }},
-            physics: {{
-                enabled: false
-            }},
-            interaction: {{
+                }
+            },
+            physics: {
+                enabled: false,
+                // vis.js fits the initial view itself (on load, or once stabilization ends
+                // if physics is turned on), so no separate fit() handler is registered
+                stabilization: { fit: true }
+            },
+            interaction: {
                 hover: true,
                 selectConnectedEdges: true,
                 tooltipDelay: 200
-            }},
-            nodes: {{
+            },
+            nodes: {
                 borderWidth: 3,
                 shadow: true,
-                font: {{ size: 16, color: '#343434', bold: true }}
-            }},
-            edges: {{
+                font: { size: 16, color: '#343434', bold: true }
+            },
+            edges: {
                 shadow: true,
                 width: 3,
-                font: {{ size: 12, bold: true, background: 'rgba(255,255,255,0.8)' }},
-                smooth: {{
+                font: { size: 12, bold: true, background: 'rgba(255,255,255,0.8)' },
+                smooth: {
                     type: 'continuous',
                     roundness: 0.1
-                }}
-            }}
-        }};
+                }
+            }
+        };
         
         // Network
         const container = document.getElementById('network-container');
-        const data = {{ nodes: nodes, edges: edges }};
+        const data = { nodes: nodes, edges: edges };
         const network = new vis.Network(container, data, options);
         
-        // Global variables for search
-        let allTables = [];
+        // Node positions computed by the initial layout (used by resetView)
+        let initialPositions = null;
+        
+        // Global variables for search (table names are sorted in Python)
+        const allTables = __ALL_TABLES_JSON__;
+        const allTablesLower = __ALL_TABLES_LOWER_JSON__;
         let currentSearchResults = [];
+        let lastQuery = '';
+        let lastMatchIndices = null;
+        let searchTimer = null;
+        let cachedInputRect = null;
+        
+        // Fill label with the table name, wrapping every occurrence of the (lowercase) query in a highlight span
+        function highlightMatch(label, table, tableLower, query) {
+            const qLen = query.length;
+            let start = 0;
+            let idx = tableLower.indexOf(query);
+            while (idx !== -1) {
+                if (idx > start) {
+                    label.appendChild(document.createTextNode(table.slice(start, idx)));
+                }
+                const mark = document.createElement('span');
+                mark.className = 'search-highlight';
+                mark.textContent = table.slice(idx, idx + qLen);
+                label.appendChild(mark);
+                start = idx + qLen;
+                idx = tableLower.indexOf(query, start);
+            }
+            if (start < table.length) {
+                label.appendChild(document.createTextNode(table.slice(start)));
+            }
+        }
         
-        // Initialize search functionality
-        function initializeSearch() {{
-            try {{
-                allTables = nodes.get().map(node => node.id).sort();
-                console.log('Search initialized with tables:', allTables.length);
-            }} catch (error) {{
-                console.error('Error initializing search:', error);
-                allTables = [];
-            }}
-        }}
-        
-        // Wait for network to be fully loaded before initializing search
-        network.once('afterDrawing', function() {{
-            console.log('Network drawing completed, initializing search...');
-            initializeSearch();
-        }});
+        function createSearchMessage(icon, text) {
+            const message = document.createElement('div');
+            message.className = 'search-no-results';
+            if (icon) {
+                const iconSpan = document.createElement('span');
+                iconSpan.className = 'material-icons';
+                iconSpan.textContent = icon;
+                message.appendChild(iconSpan);
+                text = ' ' + text;
+            }
+            message.appendChild(document.createTextNode(text));
+            return message;
+        }
+        
+        // Record the initial layout once the network has been drawn
+        network.once('afterDrawing', function() {
+            dlog('Network drawing completed, search ready with tables:', allTables.length);
+            initialPositions = network.getPositions();
+        });
         
         // Event listeners for node selection
-        network.on('select', function(params) {{
+        network.on('select', function(params) {
             const selectedNodes = params.nodes;
             const selectedEdges = params.edges;
             
             document.getElementById('selected-count').textContent = selectedNodes.length + selectedEdges.length;
             
-            if (selectedNodes.length === 1) {{
+            if (selectedNodes.length === 1) {
                 showNodeDetails(selectedNodes[0]);
-            }} else {{
+            } else {
                 hideNodeDetails();
-            }}
-        }});
+            }
+        });
         
-        network.on('deselectNode', function(params) {{
+        network.on('deselectNode', function(params) {
             hideNodeDetails();
-        }});
+        });
         
         // Control functions
-        function resetView() {{
+        function resetView() {
             network.unselectAll();
             hideNodeDetails();
             document.getElementById('selected-count').textContent = '0';
-            network.setOptions({{
-                layout: {{
-                    hierarchical: {{
-                        enabled: true,
-                        direction: 'UD',
-                        sortMethod: 'directed',
-                        levelSeparation: 150,
-                        nodeSpacing: 200,
-                        treeSpacing: 200
-                    }}
-                }},
-                physics: {{
-                    enabled: false
-                }}
-            }});
+            restoreInitialPositions();
             network.fit();
-        }}
+        }
         
-        function fitNetwork() {{
+        // The layout options never change, so instead of re-running the hierarchical
+        // layout only nodes dragged away from their initial position are moved back
+        function restoreInitialPositions() {
+            if (!initialPositions) {
+                return;
+            }
+            const currentPositions = network.getPositions();
+            Object.keys(initialPositions).forEach(nodeId => {
+                const initial = initialPositions[nodeId];
+                const current = currentPositions[nodeId];
+                if (current && (current.x !== initial.x || current.y !== initial.y)) {
+                    network.moveNode(nodeId, initial.x, initial.y);
+                }
+            });
+        }
+        
+        function fitNetwork() {
             network.fit();
-        }}
+        }
         
-        function clearSelection() {{
+        function clearSelection() {
             network.unselectAll();
             hideNodeDetails();
             document.getElementById('selected-count').textContent = '0';
-        }}
+        }
         
         // Search functionality
-        function handleSearchKeyup(event) {{
-            if (['ArrowDown', 'ArrowUp', 'Enter', 'Escape'].includes(event.key)) {{
+        function handleSearchKeyup(event) {
+            if (['ArrowDown', 'ArrowUp', 'Enter', 'Escape'].includes(event.key)) {
                 return;
-            }}
-            searchTables();
-        }}
+            }
+            searchTablesDebounced();
+        }
+        
+        // Coalesce bursts of keystrokes into a single render
+        function searchTablesDebounced() {
+            clearTimeout(searchTimer);
+            searchTimer = setTimeout(searchTables, 150);
+        }
+        
+        function cancelPendingSearch() {
+            clearTimeout(searchTimer);
+            searchTimer = null;
+        }
         
-        function positionSearchResults() {{
+        // The dropdown is position: fixed at (0, 0) and moved with a transform, so the
+        // input's viewport rect is used as-is.
+        // It is cached until focus / resize / scroll so typing never forces a layout read.
+        function positionSearchResults() {
+            if (cachedInputRect) {
+                return;
+            }
             const searchInput = document.getElementById('table-search');
             const searchResults = document.getElementById('search-results');
-            const rect = searchInput.getBoundingClientRect();
+            cachedInputRect = searchInput.getBoundingClientRect();
             
-            searchResults.style.top = (rect.bottom + window.scrollY) + 'px';
-            searchResults.style.left = rect.left + 'px';
-            searchResults.style.width = rect.width + 'px';
-        }}
+            searchResults.style.transform = `translate(${cachedInputRect.left}px, ${cachedInputRect.bottom}px)`;
+            searchResults.style.width = cachedInputRect.width + 'px';
+        }
         
-        function searchTables() {{
+        function searchTables() {
             const searchInput = document.getElementById('table-search');
             const searchResults = document.getElementById('search-results');
             const query = searchInput.value.toLowerCase().trim();
             
-            if (!allTables || allTables.length === 0) {{
-                initializeSearch();
-                if (!allTables || allTables.length === 0) {{
-                    return;
-                }}
-            }}
+            if (allTables.length === 0) {
+                return;
+            }
             
-            if (query === '') {{
+            if (query === '') {
                 searchResults.style.display = 'none';
                 currentSearchResults = [];
+                lastQuery = '';
+                lastMatchIndices = null;
                 return;
-            }}
+            }
             
-            currentSearchResults = allTables.filter(table => 
-                table.toLowerCase().includes(query)
-            ).sort();
+            // When the query only grew, every match also contains the previous query,
+            // so it is enough to re-check the previous matches
+            const candidates = (lastMatchIndices && query.startsWith(lastQuery)) ? lastMatchIndices : null;
+            const candidateCount = candidates ? candidates.length : allTablesLower.length;
             
-            if (currentSearchResults.length > 0) {{
+            // allTables is already sorted, so matches come out in order
+            currentSearchResults = [];
+            const matchedLower = [];
+            const matchIndices = [];
+            for (let c = 0; c < candidateCount; c++) {
+                const i = candidates ? candidates[c] : c;
+                if (allTablesLower[i].indexOf(query) !== -1) {
+                    currentSearchResults.push(allTables[i]);
+                    matchedLower.push(allTablesLower[i]);
+                    matchIndices.push(i);
+                }
+            }
+            lastQuery = query;
+            lastMatchIndices = matchIndices;
+            
+            const fragment = document.createDocumentFragment();
+            if (currentSearchResults.length > 0) {
+                const rowTemplate = document.getElementById('search-row-tpl').content.firstElementChild;
                 const maxResults = Math.min(currentSearchResults.length, 15);
-                searchResults.innerHTML = currentSearchResults
-                    .slice(0, maxResults)
-                    .map((table, index) => {{
-                        const highlightedText = table.replace(
-                            new RegExp(`(${{query}})`, 'gi'), 
-                            '<span style="background-color: #fff3cd; font-weight: bold;">$1</span>'
-                        );
-                        return `
-                            <div class="search-result-item" 
-                                 onclick="selectTable('${{table}}')" 
-                                 onmousedown="event.preventDefault()">
-                                <span class="material-icons">table_chart</span>
-                                <span>${{highlightedText}}</span>
-                            </div>
-                        `;
-                    }}).join('');
+                for (let i = 0; i < maxResults; i++) {
+                    const row = rowTemplate.cloneNode(true);
+                    row.dataset.table = currentSearchResults[i];
+                    highlightMatch(row.querySelector('.row-label'), currentSearchResults[i], matchedLower[i], query);
+                    fragment.appendChild(row);
+                }
                 
-                if (currentSearchResults.length > maxResults) {{
-                    searchResults.innerHTML += `
-                        <div class="search-no-results">
-                            他 ${{currentSearchResults.length - maxResults}} 件のテーブルが見つかりました
-                        </div>
-                    `;
-                }}
-                
-                positionSearchResults();
-                searchResults.style.display = 'block';
-            }} else {{
-                searchResults.innerHTML = `
-                    <div class="search-no-results">
-                        <span class="material-icons">search_off</span>
-                        "${{query}}" に一致するテーブルが見つかりませんでした
-                    </div>
-                `;
-                positionSearchResults();
-                searchResults.style.display = 'block';
-            }}
-        }}
+                if (currentSearchResults.length > maxResults) {
+                    fragment.appendChild(createSearchMessage(null,
+                        `他 ${currentSearchResults.length - maxResults} 件のテーブルが見つかりました`));
+                }
+            } else {
+                fragment.appendChild(createSearchMessage('search_off',
+                    `"${query}" に一致するテーブルが見つかりませんでした`));
+            }
+            searchResults.replaceChildren(fragment);
+            positionSearchResults();
+            searchResults.style.display = 'block';
+        }
         
-        function selectTable(tableName) {{
+        // One delegated handler for all result rows (rows are rebuilt on every search)
+        const searchResultsElement = document.getElementById('search-results');
+        searchResultsElement.addEventListener('mousedown', function(event) {
+            if (event.target.closest('.search-result-item')) {
+                event.preventDefault();
+            }
+        });
+        searchResultsElement.addEventListener('click', function(event) {
+            const row = event.target.closest('.search-result-item');
+            if (row) {
+                selectTable(row.dataset.table);
+            }
+        });
+        
+        function selectTable(tableName) {
+            cancelPendingSearch();
             network.unselectAll();
             
-            if (!allTables || !allTables.includes(tableName)) {{
+            if (!allTables.includes(tableName)) {
                 return;
-            }}
+            }
             
             network.selectNodes([tableName]);
-            network.focus(tableName, {{
+            network.focus(tableName, {
                 scale: 2.0,
-                offset: {{x: 0, y: 0}},
-                animation: {{
+                offset: {x: 0, y: 0},
+                animation: REDUCED_MOTION ? false : {
                     duration: 1500,
                     easingFunction: 'easeInOutCubic'
-                }}
-            }});
+                }
+            });
             
             showNodeDetails(tableName);
             document.getElementById('selected-count').textContent = '1';
@@ -794,134 +913,223 @@ class HTMLTemplateGenerator:
             searchInput.value = '';
             searchInput.blur();
             document.getElementById('search-results').style.display = 'none';
-        }}
+        }
         
-        function showSearchResults() {{
+        function showSearchResults() {
             const searchInput = document.getElementById('table-search');
-            if (searchInput.value.trim() !== '') {{
+            cachedInputRect = null;
+            if (searchInput.value.trim() !== '') {
                 positionSearchResults();
                 searchTables();
-            }}
-        }}
+            }
+        }
         
-        function hideSearchResults() {{
-            setTimeout(() => {{
+        function hideSearchResults() {
+            setTimeout(() => {
                 const searchResults = document.getElementById('search-results');
-                if (searchResults && document.activeElement.id !== 'table-search') {{
+                if (searchResults && document.activeElement.id !== 'table-search') {
                     searchResults.style.display = 'none';
-                }}
-            }}, 200);
-        }}
+                }
+            }, 200);
+        }
         
-        function showNodeDetails(nodeId) {{
-            const detailsPanel = document.getElementById('selection-details');
-            const tableName = document.getElementById('selected-table-name');
-            const tableInfo = document.getElementById('table-info');
-            const relatedTables = document.getElementById('related-tables');
-            const joinConditions = document.getElementById('join-conditions');
-            
-            tableName.innerHTML = `
-                <span class="material-icons">table_chart</span>
-                ${{nodeId}} Table
-            `;
-            
-            const nodeData = nodes.get(nodeId);
-            const connections = network.getConnectedNodes(nodeId);
-            tableInfo.innerHTML = `
+        // Parsed detail sections per node; the graph data never changes after load
+        const nodeDetailCache = new Map();
+        
+        function htmlToFragment(html) {
+            const template = document.createElement('template');
+            template.innerHTML = html;
+            return template.content;
+        }
+        
+        function buildNodeDetails(nodeId) {
+            const detail = nodeDetails[nodeId] || { connections: [], joinsHtml: '' };
+            const connections = detail.connections;
+            const infoHtml = `
                 <div class="info-item">
                     <span class="material-icons">storage</span>
                     <span class="info-label">Table Name:</span>
-                    <span class="info-value">${{nodeId}}</span>
+                    <span class="info-value">${nodeId}</span>
                 </div>
                 <div class="info-item">
                     <span class="material-icons">hub</span>
                     <span class="info-label">Connections:</span>
-                    <span class="info-value">${{connections.length}} tables</span>
+                    <span class="info-value">${connections.length} tables</span>
                 </div>
             `;
             
             let relatedHtml = '';
-            if (connections.length > 0) {{
-                connections.forEach(connectedNodeId => {{
-                    relatedHtml += `
+            if (connections.length > 0) {
+                relatedHtml = connections.map(connectedNodeId => `
                         <div class="table-connection">
-                            <span>${{nodeId}}</span>
+                            <span>${nodeId}</span>
                             <span class="connection-arrow">⟷</span>
-                            <span>${{connectedNodeId}}</span>
+                            <span>${connectedNodeId}</span>
                         </div>
-                    `;
-                }});
-            }} else {{
+                    `).join('');
+            } else {
                 relatedHtml = '<div class="table-connection">No related tables found</div>';
-            }}
-            relatedTables.innerHTML = relatedHtml;
+            }
             
-            // Join conditions with grouping
-            let conditionsHtml = '';
-            const connectedEdgeIds = network.getConnectedEdges(nodeId);
-            if (connectedEdgeIds.length > 0) {{
-                const tableRelationships = {{}};
-                
-                connectedEdgeIds.forEach(edgeId => {{
-                    const edge = edges.get(edgeId);
-                    const isFromNode = edge.from === nodeId;
-                    const otherTable = isFromNode ? edge.to : edge.from;
-                    
-                    if (!tableRelationships[otherTable]) {{
-                        tableRelationships[otherTable] = [];
-                    }}
-                    
-                    const relationshipsList = edge.label.split(';').map(rel => rel.trim());
-                    relationshipsList.forEach(relationship => {{
-                        if (relationship && !tableRelationships[otherTable].includes(relationship)) {{
-                            tableRelationships[otherTable].push(relationship);
-                        }}
-                    }});
-                }});
-                
-                Object.keys(tableRelationships).forEach(otherTable => {{
-                    const conditions = tableRelationships[otherTable];
-                    const isMultiColumn = conditions.length > 1;
-                    
-                    const columnCountText = isMultiColumn ? `<span style="color: #ff9800; font-size: 12px; margin-left: 8px;">(` + conditions.length + ` columns)</span>` : '';
-                    const joinConditionsText = conditions.join('<br>');
-                    
-                    conditionsHtml += `
-                        <div class="join-condition">
-                            <div class="condition-type">
-                                <span class="material-icons">link</span>
-                                ${{nodeId}} ⟷ ${{otherTable}}
-                                ${{columnCountText}}
-                            </div>
-                            <div style="font-family: 'Roboto Mono', monospace; font-size: 13px; color: #424242;">
-                                ${{joinConditionsText}}
-                            </div>
-                        </div>
-                    `;
-                }});
-            }} else {{
-                conditionsHtml = '<div class="join-condition">No join conditions found</div>';
-            }}
-            joinConditions.innerHTML = conditionsHtml;
+            // Join conditions grouped by the other table (rendered in Python)
+            const conditionsHtml = detail.joinsHtml || '<div class="join-condition">No join conditions found</div>';
+            
+            return {
+                info: htmlToFragment(infoHtml),
+                related: htmlToFragment(relatedHtml),
+                joins: htmlToFragment(conditionsHtml)
+            };
+        }
+        
+        function showNodeDetails(nodeId) {
+            const detailsPanel = document.getElementById('selection-details');
+            const tableName = document.getElementById('selected-table-name');
+            
+            tableName.innerHTML = `
+                <span class="material-icons">table_chart</span>
+                ${nodeId} Table
+            `;
+            
+            let details = nodeDetailCache.get(nodeId);
+            if (!details) {
+                details = buildNodeDetails(nodeId);
+                nodeDetailCache.set(nodeId, details);
+            }
+            document.getElementById('table-info').replaceChildren(details.info.cloneNode(true));
+            document.getElementById('related-tables').replaceChildren(details.related.cloneNode(true));
+            document.getElementById('join-conditions').replaceChildren(details.joins.cloneNode(true));
             
             detailsPanel.style.display = 'block';
-            detailsPanel.scrollIntoView({{ behavior: 'smooth', block: 'start' }});
-        }}
+            detailsPanel.scrollIntoView({ behavior: REDUCED_MOTION ? 'auto' : 'smooth', block: 'start' });
+        }
         
-        function hideNodeDetails() {{
+        function hideNodeDetails() {
             document.getElementById('selection-details').style.display = 'none';
-        }}
-        
-        // Initial fit
-        network.once('stabilizationIterationsDone', function() {{
-            network.fit();
-        }});
+        }
         
-        // Handle window resize
-        window.addEventListener('resize', function() {{
+        // Handle window resize / scroll: the input may have moved
+        function repositionSearchResults() {
+            cachedInputRect = null;
             const searchResults = document.getElementById('search-results');
-            if (searchResults && searchResults.style.display === 'block') {{
+            if (searchResults && searchResults.style.display === 'block') {
                 positionSearchResults();
-            }}
-        }});
-        '''
\ No newline at end of file
+            }
+        }
+        window.addEventListener('resize', repositionSearchResults, { passive: true });
+        window.addEventListener('scroll', repositionSearchResults, { passive: true });
+        '''
+
+
+class HTMLTemplateGenerator:
+    """HTMLテンプレート生成クラス"""
+    
+    def __init__(self):
+        pass
+    
+    def create_html_template(self, nodes_data: List[Dict[str, Any]], edges_data: List[Dict[str, Any]], 
+                           title: str = "SQL Table Relationships", 
+                           subtitle: str = "テーブル間の関係の可視化",
+                           source_info: str = None,
+                           debug: bool = False) -> str:
+        """
+        インタラクティブHTMLテンプレートを生成
+        
+        Args:
+            nodes_data: ノードデータのリスト
+            edges_data: エッジデータのリスト
+            title: ページタイトル
+            subtitle: サブタイトル
+            source_info: データソース情報（CSV情報など）
+            debug: True の場合、ブラウザのコンソールにデバッグログを出力
+        
+        Returns:
+            HTMLコンテンツ文字列
+        """
+        
+        # データソース情報のHTMLを生成
+        source_info_html = ""
+        if source_info:
+            source_info_html = _fill_template(_SOURCE_INFO_TEMPLATE, {'SOURCE_INFO': source_info})
+        
+        return _fill_template(_HTML_TEMPLATE, {
+            'TITLE': title,
+            'SUBTITLE': subtitle,
+            'NODE_COUNT': str(len(nodes_data)),
+            'EDGE_COUNT': str(len(edges_data)),
+            'SOURCE_INFO_HTML': source_info_html,
+            'CSS_STYLES': self._get_css_styles(),
+            'JAVASCRIPT_CODE': self._get_javascript_code(nodes_data, edges_data, debug),
+        })
+
+    def _get_css_styles(self) -> str:
+        """CSSスタイルを取得"""
+        return _CSS_STYLES
+
+    def _get_javascript_code(self, nodes_data: List[Dict[str, Any]], edges_data: List[Dict[str, Any]],
+                             debug: bool = False) -> str:
+        """JavaScript コードを取得"""
+        # 検索用のテーブル名一覧（ソート済み）
+        all_tables = sorted(node['id'] for node in nodes_data)
+        return _fill_template(_JAVASCRIPT_TEMPLATE, {
+            'DEBUG': 'true' if debug else 'false',
+            'NODES_JSON': _dumps_json(nodes_data),
+            'EDGES_JSON': _dumps_json(edges_data),
+            'NODE_DETAILS_JSON': _dumps_json(self._build_node_details(nodes_data, edges_data)),
+            'ALL_TABLES_JSON': _dumps_json(all_tables),
+            'ALL_TABLES_LOWER_JSON': _dumps_json([table.lower() for table in all_tables]),
+        })
+
+    def _build_node_details(self, nodes_data: List[Dict[str, Any]], edges_data: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """
+        ノードごとの接続テーブルと結合条件（相手テーブル別・重複なし、HTML 描画済み）を事前計算
+        
+        vis.js の getConnectedNodes / getConnectedEdges と同じく、エッジの並び順で集計する
+        （getConnectedNodes と同様、自己参照エッジのノード自身は接続テーブルに含めない）
+        """
+        # 順序付き集合として dict を使用
+        details = {node['id']: ({}, {}) for node in nodes_data}
+        
+        for edge in edges_data:
+            source, target = edge['from'], edge['to']
+            conditions = [rel.strip() for rel in edge.get('label', '').split(';')]
+            
+            # 自己参照エッジは 1 回だけ数える
+            ends = ((source, target),) if source == target else ((source, target), (target, source))
+            for node_id, other_table in ends:
+                entry = details.get(node_id)
+                if entry is None:
+                    continue
+                connections, relationships = entry
+                # 自己結合の条件は表示するが、自分自身を接続テーブルとしては数えない
+                if other_table != node_id:
+                    connections[other_table] = None
+                table_conditions = relationships.setdefault(other_table, {})
+                for condition in conditions:
+                    if condition:
+                        table_conditions[condition] = None
+        
+        return {
+            node_id: {
+                'connections': list(connections),
+                'joinsHtml': self._render_join_conditions(node_id, relationships)
+            }
+            for node_id, (connections, relationships) in details.items()
+        }
+
+    def _render_join_conditions(self, node_id: str, relationships: Dict[str, Dict[str, None]]) -> str:
+        """詳細パネルの結合条件（相手テーブルごとに 1 ブロック）の HTML を生成"""
+        node_label = html.escape(node_id, quote=False)
+        parts = []
+        for other_table, conditions in relationships.items():
+            column_count = ''
+            if len(conditions) > 1:
+                column_count = f'<span class="column-count">({len(conditions)} columns)</span>'
+            conditions_html = '<br>'.join(html.escape(condition, quote=False) for condition in conditions)
+            parts.append(
+                '<div class="join-condition">'
+                '<div class="condition-type"><span class="material-icons">link</span> '
+                f'{node_label} ⟷ {html.escape(other_table, quote=False)} {column_count}</div> '
+                f'<div class="condition-columns">{conditions_html}</div>'
+                '</div> '
+            )
+        return ''.join(parts)